@@ -29,11 +29,235 @@ REQUIREMENTS:
 - Use a list comprehension (not a traditional for loop)
 - The solution should be a one-liner
 - Include type hints for the function signature
+
+BEYOND THE CHALLENGE:
+---------------------
+The reference `square_positives` keeps that one-liner for lists and other
+iterables. Typed arrays (`array.array`, NumPy) take a separate
+whole-array path and keep their type, and `square_positives_chunked`
+streams inputs too large for memory, optionally across processes.
 """
 
+import os
+import sys
+import time
+from array import array
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from math import isqrt
+from typing import TextIO
+
+import pytest
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; arrays then take a pure-Python path
+    np = None
+
+# Integer array typecodes by signedness, narrowest first
+_SIGNED_CODES = "bhilq"
+_UNSIGNED_CODES = "BHILQ"
+
+
+def _square_typecode(code: str) -> str:
+    """
+    Typecode wide enough for the square of any non-negative `code` value:
+    twice the width, capped at 64 bits (where values must be range-checked).
+    """
+    if code in "fd":
+        return "d"
+    family = _SIGNED_CODES if code in _SIGNED_CODES else _UNSIGNED_CODES
+    width = min(array(code).itemsize * 2, 8)
+    return next(c for c in family if array(c).itemsize >= width)
+
+
+def _square_positives_numpy(values: "np.ndarray") -> "np.ndarray":
+    """Vectorized mask-and-square with overflow-safe dtype promotion."""
+    if values.dtype == np.bool_:
+        values = values.view(np.uint8)
+    kind, size = values.dtype.kind, values.dtype.itemsize
+    if kind not in "iuf":
+        raise TypeError(f"square_positives() needs numbers, got dtype {values.dtype}")
+    kept = values[values >= 0] if kind != "u" else values.ravel()
+    if kind == "f":
+        return np.square(kept, dtype=np.float64)
+    result_dtype = np.dtype(f"{kind}{min(size * 2, 8)}")
+    if size == 8 and len(kept):
+        # Squares of 64-bit values can exceed 64 bits; stay exact with
+        # Python ints rather than wrap around
+        if int(kept.max()) > isqrt(int(np.iinfo(result_dtype).max)):
+            return kept.astype(object) ** 2
+    return np.square(kept, dtype=result_dtype)
+
+
+def square_positives(
+    numbers: "list[int] | array | np.ndarray",
+) -> "list[int] | array | np.ndarray":
+    """
+    Square the non-negative numbers, dropping the negative ones.
+
+    Lists and other iterables (including bytes, bytearray and memoryview)
+    use the list comprehension and return a list. NumPy arrays and
+    `array.array` are instead masked and squared as whole arrays without
+    building Python ints, into a type wide enough that squares cannot
+    overflow (int16 -> int32, ..., float32 -> float64). 64-bit integers are
+    range-checked: NumPy input whose squares exceed 64 bits gets an exact
+    object array, while `array.array` input raises OverflowError since it
+    cannot hold such values.
+
+    Args:
+        numbers: Integers as a list or iterable, or numbers in a typed array
+
+    Returns:
+        A 1-D NumPy array for NumPy input, an `array.array` for
+        `array.array` input, and a list for anything else
+    """
+    if np is not None and isinstance(numbers, np.ndarray):
+        return _square_positives_numpy(numbers)
+    if not isinstance(numbers, array):
+        return [x**2 for x in numbers if x >= 0]
+    code = numbers.typecode
+    if code not in _SIGNED_CODES + _UNSIGNED_CODES + "fd":
+        raise TypeError(f"square_positives() cannot square array typecode {code!r}")
+    result_code = _square_typecode(code)
+    if np is None:
+        return array(result_code, [x * x for x in numbers if x >= 0])
+    squared = _square_positives_numpy(np.asarray(memoryview(numbers)))
+    if squared.dtype == object:
+        raise OverflowError(
+            f"squares do not fit in array typecode {result_code!r}; "
+            "pass a list or a NumPy array"
+        )
+    return array(result_code, squared.tobytes())
+
+
+def _read_ints(lines: Iterable[str]) -> Iterator[int]:
+    """Whitespace-separated integers from lines of text, lazily."""
+    return map(int, chain.from_iterable(line.split() for line in lines))
+
+
+def _chunks(numbers: Iterable[int], size: int) -> Iterator[list[int]]:
+    """Consecutive lists of `size` items (the last may be shorter)."""
+    iterator = iter(numbers)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _square_chunk(chunk: list[int]) -> list[int]:
+    """Process-pool task: the comprehension over one input chunk."""
+    return [x**2 for x in chunk if x >= 0]
+
+
+def _ordered_results(
+    chunks: Iterable[list[int]], workers: int
+) -> Iterator[list[int]]:
+    """
+    Square chunks in a process pool, yielding results in input order.
+
+    At most two chunks per worker are in flight, so a huge or endless input
+    is never read (or held) far ahead of the consumer.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_square_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def square_positives_chunked(
+    numbers: Iterable[int] | TextIO | str,
+    chunk_size: int = 1 << 16,
+    workers: int | None = None,
+) -> Iterator[list[int]]:
+    """
+    Streaming `square_positives`: yield the squares in lists of `chunk_size`.
+
+    The input is consumed `chunk_size` items at a time and every output
+    chunk except the last holds exactly `chunk_size` squares, so memory
+    stays bounded however long the input is.
 
-def square_positives(numbers: list[int]) -> list[int]:
-    return [x**2 for x in numbers if x >= 0]
+    Args:
+        numbers: Any iterable of integers, an open text file, or the path of
+            a text file holding whitespace-separated integers
+        chunk_size: Number of squares per yielded list
+        workers: With more than one, input chunks are squared in a process
+            pool of this many workers; results keep the input order
+
+    Yields:
+        Lists of squares of the non-negative numbers, in input order
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    if isinstance(numbers, (str, os.PathLike)):
+        with open(numbers) as f:
+            yield from square_positives_chunked(f, chunk_size, workers)
+        return
+    if hasattr(numbers, "read"):
+        numbers = _read_ints(numbers)
+    chunks = _chunks(numbers, chunk_size)
+    if workers is not None and workers > 1:
+        squared = _ordered_results(chunks, workers)
+    else:
+        squared = map(_square_chunk, chunks)
+    pending: list[int] = []
+    for part in squared:
+        pending.extend(part)
+        if len(pending) >= chunk_size:
+            full = len(pending) - len(pending) % chunk_size
+            for start in range(0, full, chunk_size):
+                yield pending[start : start + chunk_size]
+            del pending[:full]
+    if pending:
+        yield pending
+
+
+def _sample_numbers(n: int) -> Iterator[int]:
+    """Deterministic mix of negative and non-negative integers."""
+    return ((i * 7919) % 2001 - 1000 for i in range(n))
+
+
+def benchmark_square_positives(
+    sizes: Iterable[int] = (10**3, 10**4, 10**5, 10**6, 10**7, 10**8),
+    chunk_size: int = 1 << 16,
+    workers: int | None = None,
+    list_limit: int = 10**7,
+) -> dict[int, dict[str, float | None]]:
+    """
+    Time the comprehension, chunked and process-pool modes per input size.
+
+    The comprehension needs the whole input as a list, so it is skipped
+    (reported as None) above `list_limit` elements; the streaming modes
+    read a generator and never hold more than a few chunks, so their times
+    include producing the input.
+
+    Returns:
+        Dict mapping size to seconds per mode ('comprehension', 'chunked',
+        'parallel')
+    """
+    workers = workers or os.cpu_count() or 1
+    results = {}
+    for n in sizes:
+        timings: dict[str, float | None] = {"comprehension": None}
+        if n <= list_limit:
+            numbers = list(_sample_numbers(n))
+            started = time.perf_counter()
+            square_positives(numbers)
+            timings["comprehension"] = time.perf_counter() - started
+            del numbers
+        for mode, mode_workers in (("chunked", None), ("parallel", workers)):
+            started = time.perf_counter()
+            for _ in square_positives_chunked(
+                _sample_numbers(n), chunk_size, mode_workers
+            ):
+                pass
+            timings[mode] = time.perf_counter() - started
+        results[n] = timings
+    return results
 
 
 # Test cases
@@ -55,3 +279,104 @@ def test_single_positive():
 
 def test_mixed_with_zero():
     assert square_positives([0, 1, -1]) == [0, 1]
+
+
+def test_array_input():
+    result = square_positives(array("h", [3, -2, 0, 32767, -32768]))
+    assert result == array("i", [9, 0, 32767**2])
+    assert square_positives(array("B", [255, 0])) == array("H", [65025, 0])
+    assert square_positives(array("f", [1.5, -2.0])) == array("d", [2.25])
+    assert square_positives(array("q")) == array("q")
+    with pytest.raises(OverflowError):
+        square_positives(array("q", [2**40]))
+    with pytest.raises(TypeError):
+        square_positives(array("u", "ab"))
+
+
+def test_array_input_without_numpy(monkeypatch):
+    # The pure-Python array path gives the same arrays as the NumPy one
+    monkeypatch.setattr(sys.modules[__name__], "np", None)
+    assert square_positives(array("h", [3, -2, 0, 32767])) == array(
+        "i", [9, 0, 32767**2]
+    )
+    assert square_positives(array("B", [255, 0])) == array("H", [65025, 0])
+    assert square_positives(array("f", [1.5, -2.0])) == array("d", [2.25])
+    assert square_positives(array("q")) == array("q")
+    with pytest.raises(OverflowError):
+        square_positives(array("q", [2**40]))
+    with pytest.raises(TypeError):
+        square_positives(array("u", "ab"))
+
+
+def test_buffer_input():
+    # Buffers other than arrays keep the list output of the comprehension
+    assert square_positives(b"\x03\xff") == [9, 65025]
+    assert square_positives(bytearray([2, 0])) == [4, 0]
+    assert square_positives(memoryview(array("i", [-1, 4]))) == [16]
+
+
+def test_numpy_input():
+    np = pytest.importorskip("numpy")
+    values = np.array([1, -2, 3, -4, 5], dtype=np.int32)
+    result = square_positives(values)
+    assert isinstance(result, np.ndarray)
+    assert result.dtype == np.int64
+    assert result.tolist() == [1, 9, 25]
+
+    # Squares that would wrap around in the input dtype are promoted
+    assert square_positives(np.array([200], dtype=np.uint8)).tolist() == [40000]
+    assert square_positives(np.array([3037000499], dtype=np.int64)).dtype == np.int64
+    huge = square_positives(np.array([2**40, -1], dtype=np.int64))
+    assert huge.tolist() == [2**80]
+    assert square_positives(np.array([[1, -1], [2, 3]])).tolist() == [1, 4, 9]
+    with pytest.raises(TypeError):
+        square_positives(np.array(["a"]))
+
+
+def test_chunked(tmp_path):
+    numbers = list(_sample_numbers(1000))
+    expected = square_positives(numbers)
+    chunks = list(square_positives_chunked(iter(numbers), chunk_size=64))
+    assert [x for chunk in chunks for x in chunk] == expected
+    assert all(len(chunk) == 64 for chunk in chunks[:-1])
+    assert 0 < len(chunks[-1]) <= 64
+    assert list(square_positives_chunked([], chunk_size=4)) == []
+    assert list(square_positives_chunked([-1, -2], chunk_size=4)) == []
+
+    numbers_file = tmp_path / "numbers.txt"
+    numbers_file.write_text("1 -2 3\n\n-4 5\n")
+    assert list(square_positives_chunked(str(numbers_file), chunk_size=2)) == [
+        [1, 9],
+        [25],
+    ]
+    with open(numbers_file) as f:
+        assert list(square_positives_chunked(f)) == [[1, 9, 25]]
+    with pytest.raises(ValueError):
+        next(square_positives_chunked([1], chunk_size=0))
+
+
+def test_chunked_parallel():
+    numbers = list(_sample_numbers(5000))
+    chunks = list(square_positives_chunked(numbers, chunk_size=100, workers=2))
+    assert [x for chunk in chunks for x in chunk] == square_positives(numbers)
+    assert all(len(chunk) == 100 for chunk in chunks[:-1])
+
+
+def test_benchmark_square_positives():
+    results = benchmark_square_positives(sizes=(1000, 5000), workers=2, list_limit=1000)
+    assert list(results) == [1000, 5000]
+    assert set(results[1000]) == {"comprehension", "chunked", "parallel"}
+    assert results[1000]["comprehension"] >= 0
+    assert results[5000]["comprehension"] is None
+    assert results[5000]["parallel"] > 0
+
+
+if __name__ == "__main__":
+    for size, timings in benchmark_square_positives().items():
+        print(
+            f"{size:>11,}: "
+            + "  ".join(
+                f"{mode} {'skipped' if t is None else f'{t:.3f}s'}"
+                for mode, t in timings.items()
+            )
+        )
@@ -36,6 +36,25 @@ Think about what you need to iterate over and how to count occurrences.
 You might find the `.count()` method on lists useful.
 """
 
+import io
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from collections import Counter, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from hashlib import blake2b
+from itertools import chain, count, islice
+from typing import TextIO
+
+import pytest
+
 
 def word_frequency(words: list[str]) -> dict[str, int]:
     """
@@ -47,10 +66,441 @@ def word_frequency(words: list[str]) -> dict[str, int]:
     Returns:
         Dictionary mapping words to their frequency counts
     """
-    from collections import Counter
     return dict(Counter(words))
 
 
+def iter_word_chunks(
+    source: TextIO | str | os.PathLike,
+    chunk_size: int = 1 << 20,
+    intern: bool = False,
+) -> Iterator[list[str]]:
+    """
+    Tokenize a text stream in buffered chunks, one list of words per chunk.
+
+    Words are whitespace-separated, exactly as `str.split()` splits the
+    whole text. A word cut by a chunk boundary is carried over and joined
+    with the rest of it from the next chunk, so memory is bounded by
+    `chunk_size` rather than by the size of the text.
+
+    Args:
+        source: An open text stream or the path of a UTF-8 text file
+        chunk_size: Characters read per chunk
+        intern: Pass words through `sys.intern`, so callers that keep the
+            words hold one string per distinct word instead of one per
+            occurrence
+
+    Yields:
+        Non-empty lists of words, in text order
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    if isinstance(source, (str, os.PathLike)):
+        opened = open(source, encoding="utf-8")
+    else:
+        opened = nullcontext(source)
+    with opened as stream:
+        tail = ""
+        while chunk := stream.read(chunk_size):
+            words = (tail + chunk).split()
+            tail = "" if chunk[-1].isspace() else words.pop()
+            if words:
+                yield list(map(sys.intern, words)) if intern else words
+            del words
+        if tail:
+            yield [sys.intern(tail)] if intern else [tail]
+
+
+def iter_words(
+    source: TextIO | str | os.PathLike,
+    chunk_size: int = 1 << 20,
+    intern: bool = False,
+) -> Iterator[str]:
+    """Words of a text stream one at a time; see `iter_word_chunks`."""
+    return chain.from_iterable(iter_word_chunks(source, chunk_size, intern))
+
+
+def hash_token(word: str) -> int:
+    """
+    Stable 64-bit hash of a word, the key `word_frequency_file` counts under
+    with `hash_tokens=True` (unlike `hash()`, it is the same in every
+    process).
+    """
+    return int.from_bytes(blake2b(word.encode(), digest_size=8).digest(), "little")
+
+
+def word_frequency_file(
+    source: TextIO | str | os.PathLike,
+    chunk_size: int = 1 << 20,
+    hash_tokens: bool = False,
+) -> dict[str, int] | dict[int, int]:
+    """
+    Count word frequencies in a text file without building a word list.
+
+    The counter is updated chunk by chunk, so peak memory is proportional to
+    the vocabulary plus one chunk, not to the size of the corpus. The result
+    equals `word_frequency(text.split())`.
+
+    Args:
+        source: An open text stream or the path of a UTF-8 text file
+        chunk_size: Characters read per chunk
+        hash_tokens: Count under `hash_token(word)` instead of the word,
+            so each vocabulary entry costs a small int however long the
+            word is (distinct words colliding in 64 bits is unlikely but
+            possible)
+
+    Returns:
+        Dictionary mapping words (or their hashes) to frequency counts
+    """
+    counts = Counter()
+    for words in iter_word_chunks(source, chunk_size):
+        counts.update(map(hash_token, words) if hash_tokens else words)
+    return dict(counts)
+
+
+class CountMinSketch:
+    """
+    Approximate counts for an unbounded set of words in fixed memory.
+
+    Each word is hashed to one counter in each of `depth` rows of `width`
+    counters. Adding increments all of them, and the estimate is the
+    smallest, so collisions can only inflate it. With N the total count
+    added:
+
+    - estimate(word) >= true count, always
+    - estimate(word) <= true count + (e / width) * N with probability at
+      least 1 - exp(-depth)
+
+    Use `from_error(epsilon, delta)` to size the sketch for an error of at
+    most epsilon * N with probability 1 - delta.
+    """
+
+    __slots__ = ("width", "depth", "total", "_key", "_rows")
+
+    def __init__(self, width: int = 1 << 16, depth: int = 4, seed: int = 0):
+        if width < 1 or depth < 1:
+            raise ValueError(f"width and depth must be positive, got {width}x{depth}")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self._key = seed.to_bytes(8, "little")
+        self._rows = array("Q", bytes(8 * width * depth))
+
+    @classmethod
+    def from_error(
+        cls, epsilon: float, delta: float, seed: int = 0
+    ) -> "CountMinSketch":
+        """Sketch whose estimates exceed the truth by > epsilon*N w.p. < delta."""
+        if not 0 < epsilon < 1 or not 0 < delta < 1:
+            raise ValueError("epsilon and delta must be in (0, 1)")
+        width = math.ceil(math.e / epsilon)
+        return cls(width, math.ceil(math.log(1 / delta)), seed)
+
+    @property
+    def error_bound(self) -> float:
+        """Overestimate that any one estimate stays within w.p. 1-exp(-depth)."""
+        return math.e / self.width * self.total
+
+    def _cells(self, word: str) -> list[int]:
+        digest = blake2b(word.encode(), digest_size=16, key=self._key).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def add(self, word: str, count: int = 1) -> int:
+        """Add `count` occurrences of `word`; returns its new estimate."""
+        rows = self._rows
+        estimate = None
+        for cell in self._cells(word):
+            value = rows[cell] + count
+            rows[cell] = value
+            if estimate is None or value < estimate:
+                estimate = value
+        self.total += count
+        return estimate
+
+    def estimate(self, word: str) -> int:
+        """Upper bound on the count of `word`; see the class docstring."""
+        rows = self._rows
+        return min(rows[cell] for cell in self._cells(word))
+
+    def __getitem__(self, word: str) -> int:
+        return self.estimate(word)
+
+
+class ApproxWordFrequency(dict):
+    """
+    Top words with their estimated counts, as a plain `dict[str, int]`.
+
+    The values are Count-Min estimates: never below the true count and, with
+    probability 1 - exp(-depth) each, at most `error_bound` above it.
+    `estimate` answers the same question for any other word.
+    """
+
+    def __init__(self, counts: dict[str, int], sketch: CountMinSketch):
+        super().__init__(counts)
+        self.sketch = sketch
+
+    @property
+    def error_bound(self) -> float:
+        return self.sketch.error_bound
+
+    def estimate(self, word: str) -> int:
+        return self.sketch.estimate(word)
+
+
+def word_frequency_approx(
+    source: Iterable[str] | TextIO | str | os.PathLike,
+    top_k: int = 100,
+    width: int = 1 << 16,
+    depth: int = 4,
+    chunk_size: int = 1 << 16,
+    seed: int = 0,
+) -> ApproxWordFrequency:
+    """
+    Approximate word frequencies in memory bounded by the sketch, not the
+    vocabulary.
+
+    Counts go into a `CountMinSketch`; a heavy-hitter table tracks the words
+    with the largest estimates. The table holds at most 2 * top_k words and
+    is pruned back to top_k whenever it fills. A pruned word re-enters with
+    its full estimate as soon as it reappears, since the sketch never
+    forgets it. Each chunk of words is pre-counted exactly, so the sketch is
+    touched once per distinct word per chunk.
+
+    Args:
+        source: A list or other iterable of words, an open text stream, or
+            the path of a UTF-8 text file
+        top_k: Number of words to return
+        width: Counters per sketch row; the error bound is e / width of the
+            total word count
+        depth: Sketch rows; each estimate holds its bound with probability
+            1 - exp(-depth)
+        chunk_size: Words (or characters, for text) pre-counted per chunk
+        seed: Hash seed for the sketch
+
+    Returns:
+        The top_k words by estimated count, most frequent first, with an
+        `estimate(word)` method for every other word
+    """
+    if top_k < 1:
+        raise ValueError(f"top_k must be positive, got {top_k}")
+    sketch = CountMinSketch(width, depth, seed)
+    if isinstance(source, (str, os.PathLike)) or hasattr(source, "read"):
+        chunks = iter_word_chunks(source, chunk_size)
+    else:
+        chunks = _word_shards(source, chunk_size)
+    heavy: dict[str, int] = {}
+    floor = 0
+    for chunk in chunks:
+        for word, frequency in Counter(chunk).items():
+            estimate = sketch.add(word, frequency)
+            if estimate >= floor:
+                heavy[word] = estimate
+        if len(heavy) > 2 * top_k:
+            kept = sorted(heavy.items(), key=lambda item: item[1], reverse=True)
+            heavy = dict(kept[:top_k])
+            floor = kept[top_k - 1][1]
+    top = sorted(heavy.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    return ApproxWordFrequency(dict(top), sketch)
+
+
+_WHITESPACE = frozenset(b" \t\n\r\x0b\x0c")
+
+
+def _shard_offsets(path: str, shard_bytes: int) -> list[tuple[int, int]]:
+    """
+    Split a file into byte ranges of about `shard_bytes` that end on whitespace.
+
+    ASCII whitespace never occurs inside a multi-byte UTF-8 sequence, so each
+    range decodes on its own and no word straddles two ranges.
+    """
+    size = os.path.getsize(path)
+    offsets = [0]
+    with open(path, "rb") as f:
+        while offsets[-1] + shard_bytes < size:
+            f.seek(offsets[-1] + shard_bytes)
+            position = f.tell()
+            while block := f.read(4096):
+                cut = next((i for i, b in enumerate(block) if b in _WHITESPACE), None)
+                if cut is not None:
+                    position += cut + 1
+                    break
+                position += len(block)
+            offsets.append(min(position, size))
+    if offsets[-1] < size:
+        offsets.append(size)
+    return list(zip(offsets, offsets[1:]))
+
+
+def _count_range(path: str, start: int, end: int) -> Counter:
+    """Count the whitespace-separated words in bytes [start, end) of a file."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        return Counter(f.read(end - start).decode("utf-8").split())
+
+
+def _count_words(words: list[str]) -> Counter:
+    return Counter(words)
+
+
+def _merge_in_order(counters: Iterable[Counter]) -> Counter:
+    """
+    Fold counters into one, left to right.
+
+    `Counter.update` appends keys new to the total in their order in the
+    counter being merged, so merging adjacent shards in input order keeps
+    keys in first-occurrence order, exactly as a single `Counter` over the
+    whole input would have them.
+    """
+    total = Counter()
+    for counter in counters:
+        total.update(counter)
+    return total
+
+
+def _count_ranges(path: str, ranges: list[tuple[int, int]]) -> Counter:
+    """Process-pool task: count consecutive byte ranges and merge them here."""
+    return _merge_in_order(_count_range(path, start, end) for start, end in ranges)
+
+
+def _ordered_map(
+    pool: Executor, function: Callable, tasks: Iterable, workers: int
+) -> Iterator:
+    """
+    `function` over `tasks` in the pool, yielding results in task order.
+
+    At most two tasks per worker are in flight, so a huge input is never
+    read (or its results held) far ahead of the merge.
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(function, *task))
+        if len(pending) >= 2 * workers:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _word_shards(words: Iterable[str], size: int) -> Iterator[list[str]]:
+    iterator = iter(words)
+    while shard := list(islice(iterator, size)):
+        yield shard
+
+
+def word_frequency_parallel(
+    source: Iterable[str] | str | os.PathLike,
+    workers: int | None = None,
+    shard_size: int = 1 << 20,
+    shard_bytes: int = 1 << 24,
+) -> dict[str, int]:
+    """
+    Count word frequencies across a process pool.
+
+    The input is cut into shards that are counted concurrently and merged
+    in two levels, each a linear left-to-right fold (not a pairwise tree):
+    for a file, each task counts a run of adjacent shards and folds them
+    in the worker, so the parent receives one counter per run. The parent
+    folds the results in input order as they arrive, with at most two
+    tasks per worker in flight. The result equals `word_frequency` exactly,
+    key order included.
+
+    Args:
+        source: A list or other iterable of words, or the path of a UTF-8
+            text file whose whitespace-separated tokens are the words
+        workers: Pool size (defaults to the CPU count); 1 counts the shards
+            in-process
+        shard_size: Words per shard (and per task) for iterable input
+        shard_bytes: Approximate bytes per shard for file input; workers
+            read their own byte range, so the file is never loaded whole
+
+    Returns:
+        Dictionary mapping words to their frequency counts
+    """
+    workers = workers or os.cpu_count() or 1
+    is_file = isinstance(source, (str, os.PathLike))
+    if is_file:
+        path = os.fspath(source)
+        ranges = _shard_offsets(path, shard_bytes)
+    if workers == 1:
+        if is_file:
+            return dict(_count_ranges(path, ranges))
+        shards = _word_shards(source, shard_size)
+        return dict(_merge_in_order(map(_count_words, shards)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if is_file:
+            # About four runs per worker balances the load
+            run = max(1, math.ceil(len(ranges) / (4 * workers)))
+            tasks = ((path, ranges[i : i + run]) for i in range(0, len(ranges), run))
+            results = _ordered_map(pool, _count_ranges, tasks, workers)
+        else:
+            tasks = ((shard,) for shard in _word_shards(source, shard_size))
+            results = _ordered_map(pool, _count_words, tasks, workers)
+        return dict(_merge_in_order(results))
+
+
+def write_corpus(
+    path: str | os.PathLike,
+    n_words: int,
+    vocabulary: int = 50_000,
+    seed: int = 0,
+    words_per_line: int = 16,
+) -> None:
+    """
+    Write a synthetic corpus with a Zipf-like (1/rank) word distribution.
+    """
+    rng = random.Random(seed)
+    vocab = [f"w{rank}" for rank in range(vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    batch = 1 << 16
+    with open(path, "w", encoding="utf-8") as f:
+        for done in range(0, n_words, batch):
+            words = rng.choices(vocab, weights, k=min(batch, n_words - done))
+            f.write(
+                "\n".join(
+                    " ".join(words[i : i + words_per_line])
+                    for i in range(0, len(words), words_per_line)
+                )
+            )
+            f.write("\n")
+
+
+def benchmark_word_frequency(
+    n_words: int = 100_000_000,
+    worker_counts: Iterable[int] = (1, 2, 4, 8),
+    path: str | os.PathLike | None = None,
+    shard_bytes: int = 1 << 24,
+) -> dict[int, dict[str, float]]:
+    """
+    Time `word_frequency_parallel` over a file corpus per worker count.
+
+    A synthetic corpus of `n_words` is written to a temporary file unless
+    `path` names an existing one. One worker counts the same shards
+    in-process, which makes it the serial baseline for the speedups.
+
+    Returns:
+        Dict mapping worker count to {'seconds', 'speedup'}
+    """
+    # Only a corpus written here needs a temporary directory
+    if path is None:
+        scratch = tempfile.TemporaryDirectory()
+    else:
+        scratch = nullcontext()
+    with scratch as tmp:
+        if tmp is not None:
+            path = os.path.join(tmp, "corpus.txt")
+            write_corpus(path, n_words)
+        results = {}
+        for workers in worker_counts:
+            started = time.perf_counter()
+            word_frequency_parallel(path, workers, shard_bytes=shard_bytes)
+            results[workers] = {"seconds": time.perf_counter() - started}
+    baseline = results[min(results)]["seconds"] if results else 0.0
+    for timing in results.values():
+        timing["speedup"] = baseline / timing["seconds"]
+    return results
+
+
 # Test cases
 def test_basic():
     assert word_frequency(["apple", "banana", "apple", "cherry", "banana", "apple"]) == {
@@ -74,3 +524,157 @@ def test_duplicates():
 
 def test_all_unique():
     assert word_frequency(["x", "y", "z"]) == {"x": 1, "y": 1, "z": 1}
+
+
+def test_parallel_matches_serial(tmp_path):
+    corpus = tmp_path / "corpus.txt"
+    write_corpus(corpus, 5000, vocabulary=300, words_per_line=7)
+    words = corpus.read_text().split()
+    expected = word_frequency(words)
+
+    for workers in (1, 2):
+        for result in (
+            word_frequency_parallel(words, workers, shard_size=333),
+            word_frequency_parallel(corpus, workers, shard_bytes=1000),
+        ):
+            assert result == expected
+            assert list(result) == list(expected)
+    assert word_frequency_parallel([], 2) == {}
+
+
+def test_ordered_map_bounds_in_flight():
+    submitted = []
+
+    def endless():
+        for i in count():
+            submitted.append(i)
+            yield ([f"w{i}"],)
+
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        results = _ordered_map(pool, _count_words, endless(), 2)
+        assert next(results) == Counter(["w0"])
+        assert next(results) == Counter(["w1"])
+        assert len(submitted) == 5
+        results.close()
+
+
+def test_shard_offsets(tmp_path):
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text("héllo wörld\n  naïve  café\tx" * 50, encoding="utf-8")
+    ranges = _shard_offsets(str(corpus), 17)
+    assert ranges[0][0] == 0 and ranges[-1][1] == corpus.stat().st_size
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    words = corpus.read_text(encoding="utf-8").split()
+    assert sum(_count_ranges(str(corpus), ranges).values()) == len(words)
+    empty = tmp_path / "empty.txt"
+    empty.write_text("")
+    assert _shard_offsets(str(empty), 17) == []
+    assert word_frequency_parallel(empty, 2) == {}
+
+
+def test_benchmark_word_frequency(tmp_path, monkeypatch):
+    results = benchmark_word_frequency(2000, worker_counts=(1, 2), shard_bytes=2000)
+    assert set(results) == {1, 2}
+    assert results[1]["speedup"] == 1.0
+    assert results[2]["seconds"] > 0
+
+    # A given corpus is used as is, with no temporary directory
+    corpus = tmp_path / "corpus.txt"
+    write_corpus(corpus, 500)
+
+    def no_temporary_directory():
+        raise AssertionError("created a temporary directory")
+
+    monkeypatch.setattr(tempfile, "TemporaryDirectory", no_temporary_directory)
+    assert set(benchmark_word_frequency(path=corpus, worker_counts=(1,))) == {1}
+
+
+def test_iter_words(tmp_path):
+    text = "the quick  brown\tfox\n\njumps über the\u3000lazy dog "
+    for chunk_size in (1, 2, 3, 5, 64):
+        chunks = list(iter_word_chunks(io.StringIO(text), chunk_size))
+        assert all(chunks)
+        assert [w for chunk in chunks for w in chunk] == text.split()
+    assert list(iter_words(io.StringIO("a b"), 1)) == ["a", "b"]
+    assert list(iter_words(io.StringIO(""))) == []
+    assert list(iter_words(io.StringIO("   \n "))) == []
+
+    words = list(iter_words(io.StringIO("longword" * 3 + " x"), 4, intern=True))
+    assert words == ["longwordlongwordlongword", "x"]
+    assert words[0] is sys.intern("longwordlongwordlongword")
+
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text(text, encoding="utf-8")
+    assert list(iter_words(corpus, 4)) == text.split()
+    with pytest.raises(ValueError):
+        next(iter_word_chunks(corpus, 0))
+
+
+def test_word_frequency_file(tmp_path):
+    corpus = tmp_path / "corpus.txt"
+    write_corpus(corpus, 5000, vocabulary=200, words_per_line=9)
+    expected = word_frequency(corpus.read_text().split())
+    assert word_frequency_file(corpus, chunk_size=37) == expected
+    with open(corpus) as f:
+        assert word_frequency_file(f) == expected
+    hashed = word_frequency_file(corpus, chunk_size=100, hash_tokens=True)
+    assert hashed == {hash_token(word): n for word, n in expected.items()}
+
+
+def test_word_frequency_file_memory(tmp_path):
+    corpus = tmp_path / "corpus.txt"
+    write_corpus(corpus, 500_000, vocabulary=100)
+    size = corpus.stat().st_size
+    tracemalloc.start()
+    try:
+        word_frequency_file(corpus, chunk_size=1 << 12)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < size / 4
+
+
+def test_count_min_sketch_error_bounds(tmp_path):
+    corpus = tmp_path / "corpus.txt"
+    write_corpus(corpus, 20_000, vocabulary=5000)
+    # The original, exact word_frequency is the reference
+    exact = word_frequency(corpus.read_text().split())
+    sketch = CountMinSketch(width=256, depth=3)
+    for word, frequency in exact.items():
+        sketch.add(word, frequency)
+    assert sketch.total == 20_000
+    assert sketch.error_bound == pytest.approx(math.e / 256 * 20_000)
+
+    over = [sketch.estimate(word) - exact[word] for word in exact]
+    assert min(over) >= 0
+    assert max(over) > 0
+    violations = sum(error > sketch.error_bound for error in over)
+    assert violations / len(over) <= math.exp(-3)
+    assert sketch["never seen"] <= sketch.error_bound
+
+    sized = CountMinSketch.from_error(epsilon=0.01, delta=0.001)
+    assert (sized.width, sized.depth) == (272, 7)
+    with pytest.raises(ValueError):
+        CountMinSketch(0, 4)
+
+
+def test_word_frequency_approx(tmp_path):
+    corpus = tmp_path / "corpus.txt"
+    write_corpus(corpus, 50_000, vocabulary=2000)
+    exact = word_frequency(corpus.read_text().split())
+    ranked = sorted(exact, key=exact.get, reverse=True)
+
+    for source in (corpus, corpus.read_text().split()):
+        approx = word_frequency_approx(source, top_k=10, width=1 << 14, chunk_size=999)
+        assert isinstance(approx, dict) and len(approx) == 10
+        assert list(approx.values()) == sorted(approx.values(), reverse=True)
+        assert set(list(approx)[:5]) == set(ranked[:5])
+        for word, estimate in approx.items():
+            assert exact[word] <= estimate <= exact[word] + approx.error_bound
+        for word in ranked[-5:]:
+            estimate = approx.estimate(word)
+            assert exact[word] <= estimate <= exact[word] + approx.error_bound
+        assert approx.estimate("absent") <= approx.error_bound
+
+    assert word_frequency_approx([], top_k=3) == {}
+    assert word_frequency_approx(["a", "b", "a"], top_k=1) == {"a": 2}
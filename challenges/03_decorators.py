@@ -44,24 +44,679 @@ HINT:
 Use `functools.wraps` to preserve metadata. Access function arguments using *args, **kwargs.
 """
 
-from functools import wraps
+import asyncio
+import os
+import time
+from array import array
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from importlib.util import module_from_spec, spec_from_file_location
+from inspect import Parameter, iscoroutinefunction, signature, unwrap
+from itertools import count
 from typing import Any, Callable
+from weakref import WeakKeyDictionary, ref
 
+import pytest
 
-def validate_positive(func: Callable) -> Callable:
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; arrays are then scanned in Python
+    np = None
+
+_POSITIONAL = (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD)
+
+# Environment variable holding the process-wide validation mode at import
+VALIDATION_ENV_VAR = "VALIDATE_POSITIVE"
+
+_MODE_NAMES = {"on": 1, "true": 1, "yes": 1, "off": 0, "false": 0, "no": 0}
+
+def _parse_mode(mode: bool | int | str) -> int:
+    """
+    Normalize a validation mode to N, meaning "validate every N-th call".
+
+    True and "on" give 1 (every call), False and "off" give 0 (never), and an
+    integer N > 1, or its string form, samples one call in N.
+    """
+    if isinstance(mode, str):
+        text = mode.strip().lower()
+        try:
+            mode = _MODE_NAMES[text] if text in _MODE_NAMES else int(text)
+        except ValueError:
+            raise ValueError(f"invalid validation mode: {mode!r}") from None
+    if not isinstance(mode, int) or mode < 0:
+        raise ValueError(f"invalid validation mode: {mode!r}")
+    return int(mode)
+
+
+_default_every = _parse_mode(os.environ.get(VALIDATION_ENV_VAR, "on"))
+
+
+class _Binding:
+    """
+    A function's signature, analyzed once, with everything the decorators
+    here need to handle a call without re-inspecting it.
+    """
+
+    __slots__ = (
+        "sig",
+        "params",
+        "positional",
+        "n_positional",
+        "n_required",
+        "fast",
+        "simple",
+        "var_keyword",
+    )
+
+    def __init__(self, func: Callable):
+        self.sig = signature(func)
+        self.params = list(self.sig.parameters.values())
+        self.positional = [p.name for p in self.params if p.kind in _POSITIONAL]
+        self.n_positional = len(self.positional)
+        self.n_required = sum(
+            p.kind in _POSITIONAL and p.default is p.empty for p in self.params
+        )
+        # Positional arguments alone can satisfy bind
+        self.fast = not any(
+            p.kind is Parameter.KEYWORD_ONLY and p.default is p.empty
+            for p in self.params
+        )
+        # Every parameter is positional, so a full positional call's argument
+        # tuple is already its normalized form
+        self.simple = self.n_positional == len(self.params)
+        self.var_keyword = next(
+            (p.name for p in self.params if p.kind is Parameter.VAR_KEYWORD), None
+        )
+
+    def key(self, args: tuple, kwargs: dict) -> tuple:
+        """
+        The call's argument values in parameter order, defaults applied, so
+        that every spelling of the same call gives the same tuple.
+        """
+        bound = self.sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = bound.arguments
+        if self.var_keyword is not None:
+            extra = arguments[self.var_keyword]
+            arguments[self.var_keyword] = tuple(sorted(extra.items()))
+        return tuple(arguments.values())
+
+
+class _Switch:
+    """
+    The mode of one validated function, and how to apply it.
+
+    `set_mode` rebinds the cells that the wrapper reads at the top of every
+    call, so a switched or sampled wrapper is still a single frame. Sampled
+    calls are numbered by an `itertools.count`, whose `next()` is atomic
+    under the GIL, so concurrent callers still validate exactly one call in
+    `every`.
+
+    A module-level function decorated in place (`@validate_positive`) is
+    also rebound while it is switched off: its module name then refers to
+    the original function, so calls through that name cost nothing.
+    """
+
+    __slots__ = ("every", "set_mode", "func", "wrapper", "follows_global", "binding")
+
+    def __init__(
+        self,
+        func: Callable,
+        wrapper: Callable,
+        set_mode: Callable[[int], None],
+        follows_global: bool,
+        binding: _Binding,
+    ):
+        self.func = func
+        self.wrapper = ref(wrapper)
+        self.set_mode = set_mode
+        self.follows_global = follows_global
+        self.binding = binding
+
+    def apply(self, every: int) -> None:
+        self.every = every
+        self.set_mode(every)
+        self._rebind(every == 0)
+
+    def _rebind(self, off: bool) -> None:
+        """Swap the module binding of a module-level function (see above)."""
+        func, wrapper = self.func, self.wrapper()
+        name = getattr(func, "__name__", None)
+        namespace = getattr(func, "__globals__", None)
+        if wrapper is None or namespace is None or func.__qualname__ != name:
+            return
+        if off and namespace.get(name) is wrapper:
+            namespace[name] = func
+            _REBOUND[func] = wrapper
+        elif not off and _REBOUND.get(func) is wrapper:
+            del _REBOUND[func]
+            if namespace.get(name) is func:
+                namespace[name] = wrapper
+
+
+_SWITCHES: "WeakKeyDictionary[Callable, _Switch]" = WeakKeyDictionary()
+# Original function -> its wrapper, for functions rebound while switched off
+_REBOUND: dict[Callable, Callable] = {}
+
+
+# Scalar argument types checked with `<= 0`
+_NUMBER = (int, float)
+
+# Argument types whose elements are validated as a batch. Strings and bytes
+# are deliberately absent, and so are iterators, which a scan would consume.
+_BATCH_TYPES = (list, tuple, array, memoryview) + (
+    (np.ndarray,) if np is not None else ()
+)
+
+
+def _first_non_positive_array(values: "np.ndarray") -> tuple[Any, Any] | None:
+    """Vectorized search: one min() reduction, then locate only on failure."""
+    if values.dtype.kind not in "biuf" or not values.size:
+        return None
+    if values.dtype.kind == "f":
+        # fmin skips NaN, like the scalar check (NaN <= 0 is False)
+        smallest = np.fmin.reduce(values, axis=None)
+    else:
+        smallest = values.min()
+    if smallest > 0:
+        return None
+    hits = np.flatnonzero(values <= 0)
+    if not hits.size:  # all NaN
+        return None
+    flat = int(hits[0])
+    index = np.unravel_index(flat, values.shape)
+    index = tuple(map(int, index)) if values.ndim > 1 else flat
+    return index, values.reshape(-1)[flat]
+
+
+def _first_non_positive(values: Any) -> tuple[Any, Any] | None:
+    """
+    Index and value of the first non-positive number in a batch argument.
+
+    NumPy arrays and (with NumPy installed) buffers are checked with a
+    vectorized minimum. Lists, tuples and buffers otherwise get a C-level
+    `min()` first, and a short-circuit scan only when that fails or finds a
+    candidate; like the scalar check, the scan skips non-numbers and NaN.
+    """
+    if np is not None and isinstance(values, (np.ndarray, array, memoryview)):
+        return _first_non_positive_array(np.asarray(values))
+    if isinstance(values, memoryview) and values.ndim != 1:
+        return None
+    try:
+        if min(values) > 0:
+            return None
+    except (TypeError, ValueError):  # mixed or non-comparable items, or empty
+        pass
+    for index, value in enumerate(values):
+        if isinstance(value, (int, float)) and value <= 0:
+            return index, value
+    return None
+
+
+def _non_positive_suffix(value: Any) -> str | None:
+    """
+    The "=value" (or "[index]=value" for a batch) part of the error for an
+    argument, or None if it passes.
+    """
+    if isinstance(value, (int, float)):
+        return f"={value}" if value <= 0 else None
+    if isinstance(value, _BATCH_TYPES):
+        found = _first_non_positive(value)
+        if found is not None:
+            index, item = found
+            if isinstance(index, tuple):
+                index = ", ".join(map(str, index))
+            return f"[{index}]={item}"
+    return None
+
+
+def validate_positive(
+    func: Callable | None = None, *, mode: bool | int | str | None = None
+) -> Callable:
     """
     Decorator that validates all numeric arguments are positive (> 0).
 
+    The signature is analyzed once, here, rather than on every call:
+    parameter names are captured, and defaults are checked up front so that
+    a non-positive default costs nothing until a call actually relies on it.
+    For functions of one to three positional parameters, calls passing all
+    of them positionally run a closure specialized to that arity: unpack,
+    one inline check per argument, call. Other positional-only calls loop
+    over the arguments, and only calls with keywords bind against the
+    cached signature. Either way arguments are checked in parameter
+    order, defaults included, and the first non-positive one is reported.
+
+    Lists, tuples, `array.array`, memoryviews and NumPy arrays are validated
+    element-wise too, with a vectorized minimum for arrays and a
+    short-circuit scan otherwise (see `_first_non_positive`); the error then
+    names the first offending index, as in "f() received non-positive
+    argument: xs[3]=-1".
+
+    Validation can be switched per process or per function (see
+    `set_validation`): on, off, or sampled so that only every N-th call is
+    checked. The process-wide mode starts from the VALIDATE_POSITIVE
+    environment variable ("on", "off" or N; on when unset). A function
+    decorated while its mode is off is returned as is, with no wrapper at
+    all. Switching a module-level function off later rebinds its name in
+    the module to the original (see `_Switch`), so calls through the module
+    cost nothing either; other references to the wrapper, and nested
+    functions, still pay the wrapper's call frame and mode check.
+
     Args:
         func: The function to decorate
+        mode: This function's own mode (True/"on", False/"off", or N to
+            validate one call in N); None follows the process-wide mode
 
     Returns:
         Wrapped function with validation
     """
+    if func is None:
+        return partial(validate_positive, mode=mode)
+    every = _default_every if mode is None else _parse_mode(mode)
+    if every == 0:
+        return func
+
+    binding = _Binding(func)
+    sig, params, positional = binding.sig, binding.params, binding.positional
+    n_positional, n_required = binding.n_positional, binding.n_required
+    fast = binding.fast
+    prefix = f"{func.__name__}() received non-positive argument: "
+
+    # Error for each parameter's default, or None when it is fine (or absent)
+    default_errors = [
+        None
+        if p.default is p.empty or (suffix := _non_positive_suffix(p.default)) is None
+        else f"{prefix}{p.name}{suffix}"
+        for p in params
+    ]
+    # *args and **kwargs are containers of arguments, not arguments
+    checks = [
+        (p.name, error)
+        for p, error in zip(params, default_errors)
+        if p.kind not in (Parameter.VAR_POSITIONAL, Parameter.VAR_KEYWORD)
+    ]
+
+    # First failing default among the parameters after the i-th positional
+    trailing_errors = [
+        next(filter(None, default_errors[i:]), None) for i in range(n_positional + 1)
+    ]
+
+    def reject(index: int, value: Any) -> None:
+        raise ValueError(f"{prefix}{positional[index]}={value}")
+
+    def check_batch(index: int, value: Any) -> None:
+        suffix = _non_positive_suffix(value)
+        if suffix is not None:
+            raise ValueError(f"{prefix}{positional[index]}{suffix}")
+
+    def check(name: str, value: Any) -> None:
+        if isinstance(value, (int, float)):
+            if value <= 0:
+                raise ValueError(f"{prefix}{name}={value}")
+        elif isinstance(value, _BATCH_TYPES):
+            suffix = _non_positive_suffix(value)
+            if suffix is not None:
+                raise ValueError(f"{prefix}{name}{suffix}")
+
+    def call(args: tuple, kwargs: dict) -> Any:
+        if fast and not kwargs and n_required <= len(args) <= n_positional:
+            for name, value in zip(positional, args):
+                check(name, value)
+            error = trailing_errors[len(args)]
+            if error is not None:
+                raise ValueError(error)
+            return func(*args)
+
+        arguments = sig.bind(*args, **kwargs).arguments
+        for name, default_error in checks:
+            if name in arguments:
+                check(name, arguments[name])
+            elif default_error is not None:
+                raise ValueError(default_error)
+        return func(*args, **kwargs)
+
+    calls = count(1)
+
+    def set_mode(n: int) -> None:
+        nonlocal every, calls
+        every, calls = n, count(1)
+
+    arity = n_positional if fast and trailing_errors[n_positional] is None else 0
+    # Each wrapper first skips unsampled calls, then runs straight-line
+    # checks for the common arities; locals are single letters that no
+    # helper name can clash with
+    if arity == 1:
+
+        def wrapper(*args, **kwargs):
+            if every != 1 and (not every or next(calls) % every):
+                return func(*args, **kwargs)
+            if kwargs or len(args) != 1:
+                return call(args, kwargs)
+            (a,) = args
+            if isinstance(a, _NUMBER):
+                if a <= 0:
+                    reject(0, a)
+            elif isinstance(a, _BATCH_TYPES):
+                check_batch(0, a)
+            return func(a)
+
+    elif arity == 2:
+
+        def wrapper(*args, **kwargs):
+            if every != 1 and (not every or next(calls) % every):
+                return func(*args, **kwargs)
+            if kwargs or len(args) != 2:
+                return call(args, kwargs)
+            a, b = args
+            if isinstance(a, _NUMBER):
+                if a <= 0:
+                    reject(0, a)
+            elif isinstance(a, _BATCH_TYPES):
+                check_batch(0, a)
+            if isinstance(b, _NUMBER):
+                if b <= 0:
+                    reject(1, b)
+            elif isinstance(b, _BATCH_TYPES):
+                check_batch(1, b)
+            return func(a, b)
+
+    elif arity == 3:
+
+        def wrapper(*args, **kwargs):
+            if every != 1 and (not every or next(calls) % every):
+                return func(*args, **kwargs)
+            if kwargs or len(args) != 3:
+                return call(args, kwargs)
+            a, b, c = args
+            if isinstance(a, _NUMBER):
+                if a <= 0:
+                    reject(0, a)
+            elif isinstance(a, _BATCH_TYPES):
+                check_batch(0, a)
+            if isinstance(b, _NUMBER):
+                if b <= 0:
+                    reject(1, b)
+            elif isinstance(b, _BATCH_TYPES):
+                check_batch(1, b)
+            if isinstance(c, _NUMBER):
+                if c <= 0:
+                    reject(2, c)
+            elif isinstance(c, _BATCH_TYPES):
+                check_batch(2, c)
+            return func(a, b, c)
+
+    else:
+
+        def wrapper(*args, **kwargs):
+            if every != 1 and (not every or next(calls) % every):
+                return func(*args, **kwargs)
+            return call(args, kwargs)
+
+    wraps(func)(wrapper)
+    switch = _Switch(func, wrapper, set_mode, mode is None, binding)
+    switch.apply(every)
+    _SWITCHES[wrapper] = switch
+    return wrapper
+
+
+def set_validation(mode: bool | int | str | None, func: Callable | None = None) -> None:
+    """
+    Switch `validate_positive` checks at runtime, process-wide or for `func`.
+
+    The process-wide mode applies to functions decorated from now on and to
+    every existing wrapper that was not given a mode of its own. Functions
+    decorated while validation was off are the undecorated originals, so
+    they stay unchecked. A module-level function switched off is bound to
+    its original in the module, and back to its wrapper when switched on.
+
+    Args:
+        mode: True/"on", False/"off", or N to validate one call in N; None
+            (with `func`) makes `func` follow the process-wide mode again
+        func: A function returned by `validate_positive`, or the original
+            it is rebound to while switched off
+
+    Raises:
+        ValueError: If the mode is invalid, or `func` has no validation
+            wrapper
+    """
+    global _default_every
+    if func is None:
+        _default_every = _parse_mode(mode)
+        for wrapper, switch in list(_SWITCHES.items()):
+            if switch.follows_global:
+                switch.apply(_default_every)
+        return
+    switch = _SWITCHES.get(_REBOUND.get(func, func))
+    if switch is None:
+        raise ValueError(
+            f"{getattr(func, '__name__', func)!r} has no validate_positive wrapper"
+            " (was it decorated while validation was off?)"
+        )
+    every = _default_every if mode is None else _parse_mode(mode)
+    switch.follows_global = mode is None
+    switch.apply(every)
+
+
+def get_validation(func: Callable | None = None) -> int:
+    """
+    Current mode as N, checking every N-th call (1 = always, 0 = never),
+    process-wide or for one function.
+    """
+    if func is None:
+        return _default_every
+    switch = _SWITCHES.get(_REBOUND.get(func, func))
+    return 0 if switch is None else switch.every
+
+
+CacheInfo = namedtuple(
+    "CacheInfo", ["hits", "misses", "evictions", "expired", "maxsize", "currsize"]
+)
+
+_MISSING = object()
+# Tags the keys of results computed while validation was off
+_UNVALIDATED = object()
+
+
+class _Cache:
+    """
+    LRU mapping with optional per-entry expiry, counting hits, misses,
+    capacity evictions and expirations.
+
+    Every entry lives for the same `ttl`, so insertion order is expiry
+    order: `deadlines` queues (expiry, key) per insertion, and each insert
+    first drops the entries whose time has passed. Expired entries are
+    removed even when nothing else would evict them (maxsize=None) or
+    look them up again.
+
+    Not locked: concurrent callers may both miss and compute the same value,
+    but the mapping itself stays consistent.
+    """
+
+    __slots__ = (
+        "maxsize",
+        "ttl",
+        "timer",
+        "entries",
+        "deadlines",
+        "hits",
+        "misses",
+        "evictions",
+        "expired",
+    )
+
+    def __init__(
+        self, maxsize: int | None, ttl: float | None, timer: Callable[[], float]
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.entries: OrderedDict = OrderedDict()
+        self.deadlines: deque = deque()
+        self.hits = self.misses = self.evictions = self.expired = 0
+
+    def get(self, key: Any) -> Any:
+        """Cached value for `key`, or _MISSING; TypeError if unhashable."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            value, expires = entry
+            if expires is None or self.timer() < expires:
+                self.hits += 1
+                try:
+                    self.entries.move_to_end(key)
+                except KeyError:  # evicted meanwhile by another thread
+                    pass
+                return value
+            self.entries.pop(key, None)
+            self.expired += 1
+        self.misses += 1
+        return _MISSING
+
+    def put(self, key: Any, value: Any) -> None:
+        expires = None
+        if self.ttl is not None:
+            now = self.timer()
+            self.purge(now)
+            expires = now + self.ttl
+            self.deadlines.append((expires, key))
+        self.entries[key] = (value, expires)
+        if self.maxsize is not None:
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def purge(self, now: float) -> None:
+        """Drop the entries that expired by `now`."""
+        deadlines, entries = self.deadlines, self.entries
+        while deadlines and deadlines[0][0] <= now:
+            expires, key = deadlines.popleft()
+            entry = entries.get(key)
+            # Skip keys evicted or stored again since this deadline was queued
+            if entry is not None and entry[1] == expires:
+                entries.pop(key, None)
+                self.expired += 1
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(
+            self.hits,
+            self.misses,
+            self.evictions,
+            self.expired,
+            self.maxsize,
+            len(self.entries),
+        )
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.deadlines.clear()
+        self.hits = self.misses = self.evictions = self.expired = 0
+
+
+def cached(
+    func: Callable | None = None,
+    *,
+    maxsize: int | None = 128,
+    ttl: float | None = None,
+    timer: Callable[[], float] = time.monotonic,
+) -> Callable:
+    """
+    Decorator that memoizes results by argument values, evicting the least
+    recently used entry beyond `maxsize` and entries older than `ttl`.
+
+    Keys are the argument values in parameter order with defaults applied,
+    so f(1, 2), f(1, b=2) and f(b=2, a=1) share one entry; a call passing
+    every parameter positionally is its own key with no binding at all.
+    Like `functools.lru_cache`, equal values of different types (1, 1.0,
+    True) share a key. Calls with unhashable arguments are passed through
+    uncached, and exceptions are never cached.
+
+    Stack it on top of `validate_positive`: the signature analysis done for
+    validation is reused for the keys, hits return straight from this one
+    wrapper, and validation only runs on misses (arguments that hit were
+    already accepted when the entry was stored). Results computed while
+    that validation is switched off are kept apart and only answer calls
+    made while it is still off; while it is sampled the cache is bypassed,
+    so each call is counted toward the sample. Async functions are
+    supported; their awaited results are cached.
+
+    Args:
+        func: The function to decorate
+        maxsize: Entries kept, or None for no limit
+        ttl: Seconds an entry stays valid, or None to never expire
+        timer: Clock for `ttl`
+
+    Returns:
+        Wrapped function with `cache_info()` (a CacheInfo of hits, misses,
+        evictions, expired, maxsize and currsize) and `cache_clear()`
+    """
+    if func is None:
+        return partial(cached, maxsize=maxsize, ttl=ttl, timer=timer)
+    if maxsize is not None and maxsize < 0:
+        raise ValueError(f"maxsize must be None or >= 0, got {maxsize}")
+    if ttl is not None and ttl <= 0:
+        raise ValueError(f"ttl must be None or positive, got {ttl}")
+
+    switch = _SWITCHES.get(func)
+    binding = switch.binding if switch is not None else _Binding(func)
+    simple, n_positional, make_key = binding.simple, binding.n_positional, binding.key
+    cache = _Cache(maxsize, ttl, timer)
+    lookup, store = cache.get, cache.put
+
+    if iscoroutinefunction(unwrap(func)):
+
+        async def wrapper(*args, **kwargs):
+            every = 1 if switch is None else switch.every
+            if every > 1:
+                return await func(*args, **kwargs)
+            try:
+                if simple and not kwargs and len(args) == n_positional:
+                    key = args
+                else:
+                    key = make_key(args, kwargs)
+                if not every:
+                    key = (_UNVALIDATED, key)
+                value = lookup(key)
+            except TypeError:  # unhashable, or arguments bind rejects
+                return await func(*args, **kwargs)
+            if value is _MISSING:
+                value = await func(*args, **kwargs)
+                store(key, value)
+            return value
+
+    else:
+
+        def wrapper(*args, **kwargs):
+            every = 1 if switch is None else switch.every
+            if every > 1:
+                return func(*args, **kwargs)
+            try:
+                if simple and not kwargs and len(args) == n_positional:
+                    key = args
+                else:
+                    key = make_key(args, kwargs)
+                if not every:
+                    key = (_UNVALIDATED, key)
+                value = lookup(key)
+            except TypeError:  # unhashable, or arguments bind rejects
+                return func(*args, **kwargs)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                store(key, value)
+            return value
+
+    wraps(func)(wrapper)
+    wrapper.cache_info = cache.info
+    wrapper.cache_clear = cache.clear
+    return wrapper
 
-    def wrapper(*args, **kwargs):
-        from inspect import signature
 
+def _validate_positive_per_call(func: Callable) -> Callable:
+    """
+    The original `validate_positive`, which binds the signature on every
+    call; kept as the baseline for `benchmark_validate_positive`.
+    """
+
+    def wrapper(*args, **kwargs):
         sig = signature(func)
         bound_args = sig.bind(*args, **kwargs)
         bound_args.apply_defaults()
@@ -77,6 +732,94 @@ def validate_positive(func: Callable) -> Callable:
     return wrapper
 
 
+def _time_calls(func: Callable, n_calls: int) -> float:
+    """Nanoseconds per call of func(3, 5)."""
+    started = time.perf_counter()
+    for _ in range(n_calls):
+        func(3, 5)
+    return (time.perf_counter() - started) / n_calls * 1e9
+
+
+def _validate_elementwise(values: Any) -> None:
+    """Baseline for `benchmark_batch_validation`: a plain per-element loop."""
+    for index, value in enumerate(values):
+        if isinstance(value, (int, float)) and value <= 0:
+            raise ValueError(f"values[{index}]={value}")
+
+
+def benchmark_batch_validation(n_values: int = 1_000_000) -> dict[str, float]:
+    """
+    Time validating an all-positive batch of `n_values` numbers.
+
+    The element-wise Python loop over a list is the baseline; the others are
+    calls to a `validate_positive` function taking the same values as a list,
+    an `array.array` and (if installed) a NumPy array.
+
+    Returns:
+        Dict mapping 'elementwise_loop', 'list', 'array' and, with NumPy,
+        'numpy' to seconds per validation
+    """
+
+    @validate_positive(mode=True)
+    def total(values: Any) -> Any:
+        return values
+
+    values = [float(i % 1000 + 1) for i in range(n_values)]
+    batches = {"list": values, "array": array("d", values)}
+    if np is not None:
+        batches["numpy"] = np.asarray(values)
+
+    started = time.perf_counter()
+    _validate_elementwise(values)
+    results = {"elementwise_loop": time.perf_counter() - started}
+    for name, batch in batches.items():
+        started = time.perf_counter()
+        total(batch)
+        results[name] = time.perf_counter() - started
+    return results
+
+
+def _multiply(a: int, b: int) -> int:
+    """Module-level subject for `benchmark_validate_positive`."""
+    return a * b
+
+
+def benchmark_validate_positive(n_calls: int = 1_000_000) -> dict[str, float]:
+    """
+    Time a two-argument function undecorated, with `validate_positive`
+    validating every call, sampling one call in 100 and switched off at
+    runtime, and with the per-call-signature baseline.
+
+    'switched_off' calls the function through its module name, which is
+    rebound to the original while validation is off; 'switched_off_wrapper'
+    calls a reference to the wrapper kept from before it was switched off.
+
+    Returns:
+        Dict mapping 'undecorated', 'validated', 'sampled_1_in_100',
+        'switched_off', 'switched_off_wrapper' and 'per_call_signature' to
+        nanoseconds per call
+    """
+    global _multiply
+    original = _multiply
+    try:
+        wrapper = _multiply = validate_positive(original, mode=True)
+        set_validation(False, wrapper)
+        switched_off = _time_calls(_multiply, n_calls)
+        switched_off_wrapper = _time_calls(wrapper, n_calls)
+    finally:
+        _multiply = original
+    return {
+        "undecorated": _time_calls(original, n_calls),
+        "validated": _time_calls(validate_positive(original, mode=True), n_calls),
+        "sampled_1_in_100": _time_calls(validate_positive(original, mode=100), n_calls),
+        "switched_off": switched_off,
+        "switched_off_wrapper": switched_off_wrapper,
+        "per_call_signature": _time_calls(
+            _validate_positive_per_call(original), max(n_calls // 10, 1)
+        ),
+    }
+
+
 # Test cases
 def test_basic_validation():
     @validate_positive
@@ -134,3 +877,427 @@ def test_preserves_metadata():
 
     assert documented_func.__name__ == "documented_func"
     assert "documented" in documented_func.__doc__
+
+
+def test_matches_per_call_validation():
+    def check(a, b=2, /, c=3, *rest, d=-1, e, **extra):
+        return a
+
+    def simple(x, y=0, z=4.5):
+        return x
+
+    def keyword_default(x, *, k=0):
+        return x
+
+    def pair(x, y):
+        return x
+
+    def four(a, b, c, d):
+        return a
+
+    cases = [
+        (check, (1,), {"e": 1}),
+        (check, (1, 2, 3, 4, -5), {"e": 1, "d": 2}),
+        (check, (1, 0), {"e": 1, "d": 2}),
+        (check, (1,), {"c": -3, "d": 2, "e": 1}),
+        (check, (1,), {"d": 2, "e": False, "zz": -9}),
+        (check, (1, 2, 3, 4), {}),
+        (simple, (1,), {}),
+        (simple, (1, 2), {}),
+        (simple, (1, 2, -0.5), {}),
+        (simple, (-1, 2), {}),
+        (simple, (True, 2, float("nan")), {}),
+        (simple, (), {"x": 3, "y": 1}),
+        (simple, (1, 2, 3, 4), {}),
+        (simple, (), {}),
+        (simple, ("text", {-1}, None), {}),
+        (keyword_default, (1,), {}),
+        (keyword_default, (-1,), {"k": 1}),
+        (keyword_default, (1,), {"k": 1}),
+        (lambda: 1, (), {}),
+        (lambda: 1, (1,), {}),
+        (lambda x: x, (5,), {}),
+        (lambda x: x, (-0.0,), {}),
+        (pair, (1, 2), {}),
+        (pair, (1, -2), {}),
+        (pair, ("a", 0), {}),
+        (pair, (1,), {"y": 0}),
+        (pair, (1, 2, 3), {}),
+        (four, (1, 2, 3, 4), {}),
+        (four, (1, 2, 3, 0), {}),
+    ]
+    for func, args, kwargs in cases:
+        outcomes = []
+        for decorator in (validate_positive, _validate_positive_per_call):
+            try:
+                outcomes.append(decorator(func)(*args, **kwargs))
+            except (TypeError, ValueError) as e:
+                outcomes.append((type(e), str(e) if type(e) is ValueError else ""))
+        assert outcomes[0] == outcomes[1], (func.__name__, args, kwargs)
+
+
+def test_non_positive_default_checked_only_when_used():
+    @validate_positive
+    def scale(x: float, factor: float = 0) -> float:
+        return x * factor
+
+    assert scale(2, 3) == 6
+    assert scale(2, factor=3) == 6
+    with pytest.raises(ValueError, match=r"^scale\(\) .*: factor=0$"):
+        scale(2)
+
+
+def test_benchmark_validate_positive():
+    results = benchmark_validate_positive(2000)
+    assert set(results) == {
+        "undecorated",
+        "validated",
+        "sampled_1_in_100",
+        "switched_off",
+        "switched_off_wrapper",
+        "per_call_signature",
+    }
+    assert results["validated"] < results["per_call_signature"]
+    # Rebound to the original, so within timing noise of undecorated
+    assert results["switched_off"] < results["validated"]
+    assert results["switched_off"] < 2 * results["undecorated"] + 50
+
+
+def test_switched_off_rebinds_module_name():
+    global _multiply
+    original = _multiply
+    try:
+        wrapper = _multiply = validate_positive(original, mode=True)
+        set_validation("off", wrapper)
+        assert _multiply is original
+        assert get_validation(_multiply) == 0
+        assert _multiply(-1, 2) == -2 and wrapper(-1, 2) == -2
+
+        set_validation("on", _multiply)
+        assert _multiply is wrapper
+        with pytest.raises(ValueError, match="a=-1"):
+            _multiply(-1, 2)
+
+        # A name rebound by the caller in the meantime is left alone
+        set_validation(5, wrapper)
+        _multiply = original
+        set_validation("off", wrapper)
+        set_validation("on", wrapper)
+        assert _multiply is original
+    finally:
+        _multiply = original
+
+
+def test_parse_mode():
+    modes = (True, False, " On", "off", "1", "0", 50, "100")
+    assert [_parse_mode(mode) for mode in modes] == [1, 0, 1, 0, 1, 0, 50, 100]
+    for bad in ("sometimes", -1, "-5", 2.5, None):
+        with pytest.raises(ValueError):
+            _parse_mode(bad)
+
+
+def test_validation_switch():
+    def area(width: float, height: float) -> float:
+        return width * height
+
+    previous = get_validation()
+    try:
+        followed = validate_positive(area)
+        pinned = validate_positive(mode="on")(area)
+        set_validation("off")
+        assert get_validation() == 0 and get_validation(followed) == 0
+        assert followed(-1, 2) == -2
+        with pytest.raises(ValueError, match="width=-1"):
+            pinned(-1, 2)
+
+        assert validate_positive(area) is area
+        with pytest.raises(ValueError, match="no validate_positive wrapper"):
+            set_validation("on", validate_positive(area))
+        assert get_validation(area) == 0
+
+        set_validation("on", followed)
+        set_validation("off", pinned)
+        set_validation(True)
+        with pytest.raises(ValueError, match="height=0"):
+            followed(1, 0)
+        assert pinned(1, 0) == 0
+
+        set_validation(None, pinned)
+        with pytest.raises(ValueError):
+            pinned(1, 0)
+        assert followed.__name__ == "area" and followed.__wrapped__ is area
+    finally:
+        set_validation(previous)
+
+
+def test_sampled_validation():
+    @validate_positive(mode=3)
+    def square(x: int) -> int:
+        return x * x
+
+    outcomes = []
+    for _ in range(7):
+        try:
+            outcomes.append(square(-2))
+        except ValueError:
+            outcomes.append("rejected")
+    assert outcomes == [4, 4, "rejected", 4, 4, "rejected", 4]
+    assert get_validation(square) == 3
+
+    # Concurrent callers still validate exactly one call in three
+    def call(_: int) -> bool:
+        try:
+            square(-2)
+        except ValueError:
+            return True
+        return False
+
+    set_validation(3, square)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert sum(pool.map(call, range(300))) == 100
+
+
+def test_mode_from_environment(monkeypatch):
+    spec = spec_from_file_location("decorators_env", __file__)
+    for value, expected in (("off", 0), ("25", 25), ("on", 1)):
+        monkeypatch.setenv(VALIDATION_ENV_VAR, value)
+        module = module_from_spec(spec)
+        spec.loader.exec_module(module)
+        assert module.get_validation() == expected
+
+    def identity(x: int) -> int:
+        return x
+
+    monkeypatch.setenv(VALIDATION_ENV_VAR, "off")
+    spec.loader.exec_module(module)
+    assert module.validate_positive(identity) is identity
+
+
+def test_batch_validation():
+    @validate_positive
+    def mean(values, weights=(1, 1, 1), *, scale=1):
+        return len(values)
+
+    assert mean([1, 2.5, True]) == 3
+    assert mean((), weights=[]) == 0
+    assert mean(["a", None, [-1], "b"]) == 4
+    assert mean(array("i", [1, 2]), memoryview(b"\x01\x02")) == 2
+    assert mean([float("nan"), 3]) == 2
+
+    @validate_positive
+    def identity(values):
+        return values
+
+    iterator = iter([-1, -2])
+    assert identity(iterator) is iterator and next(iterator) == -1
+
+    cases = [
+        (([3, 2, -1, -5],), {}, "values[2]=-1"),
+        (([float("nan"), 0.0],), {}, "values[1]=0.0"),
+        (([1, "x", False],), {}, "values[2]=False"),
+        (([1], (1, 0)), {}, "weights[1]=0"),
+        ((array("d", [1.5, -2.5]),), {}, "values[1]=-2.5"),
+        ((memoryview(array("h", [4, 0, -1])),), {}, "values[1]=0"),
+        (([1],), {"weights": [-1]}, "weights[0]=-1"),
+        (([1],), {"scale": [2, -2]}, "scale[1]=-2"),
+    ]
+    for args, kwargs, detail in cases:
+        with pytest.raises(ValueError) as error:
+            mean(*args, **kwargs)
+        assert str(error.value) == f"mean() received non-positive argument: {detail}"
+
+    @validate_positive
+    def first(values=[5, -4]):
+        return values[0]
+
+    assert first([1]) == 1
+    with pytest.raises(ValueError, match=r"values\[1\]=-4$"):
+        first()
+
+
+def test_batch_validation_numpy():
+    np = pytest.importorskip("numpy")
+
+    @validate_positive
+    def norm(values):
+        return float(np.sqrt((values**2).sum()))
+
+    assert norm(np.array([3.0, 4.0])) == 5.0
+    assert norm(np.array([], dtype=np.int8)) == 0.0
+    assert norm(np.array([np.nan, 1.0])) != 0
+    assert norm(np.array([np.nan, np.nan])) != 0
+    cases = [
+        (np.array([3, 4, -5, 0], dtype=np.int16), "values[2]=-5"),
+        (np.array([np.nan, 2.0, 0.0]), "values[2]=0.0"),
+        (np.array([[1, 2], [3, 0]], dtype=np.uint8), "values[1, 1]=0"),
+        (np.array([True, False]), "values[1]=False"),
+    ]
+    for values, detail in cases:
+        with pytest.raises(ValueError) as error:
+            norm(values)
+        assert str(error.value).endswith(f": {detail}")
+
+    @validate_positive
+    def label(values):
+        return len(values)
+
+    assert label(np.array(["a", "b"])) == 2
+
+
+def test_benchmark_batch_validation():
+    results = benchmark_batch_validation(10_000)
+    assert {"elementwise_loop", "list", "array"} <= set(results)
+    assert all(seconds > 0 for seconds in results.values())
+
+
+def test_cached_lru():
+    calls = []
+
+    @cached(maxsize=2)
+    def hypotenuse(a: float, b: float = 4.0) -> float:
+        calls.append((a, b))
+        return (a * a + b * b) ** 0.5
+
+    assert hypotenuse(3, 4) == 5.0
+    assert hypotenuse(3) == hypotenuse(a=3) == hypotenuse(b=4, a=3) == 5.0
+    assert calls == [(3, 4)]
+    assert hypotenuse.cache_info() == CacheInfo(3, 1, 0, 0, 2, 1)
+
+    hypotenuse(6, 8)
+    hypotenuse(3, 4)  # refreshes (3, 4), leaving (6, 8) least recently used
+    hypotenuse(5, 12)
+    assert hypotenuse.cache_info().evictions == 1
+    hypotenuse(3, 4)
+    hypotenuse(6, 8)
+    assert calls == [(3, 4), (6, 8), (5, 12), (6, 8)]
+
+    hypotenuse.cache_clear()
+    assert hypotenuse.cache_info() == CacheInfo(0, 0, 0, 0, 2, 0)
+    assert hypotenuse.__name__ == "hypotenuse"
+
+
+def test_cached_ttl_and_keys():
+    now = [0.0]
+    calls = []
+
+    @cached(maxsize=None, ttl=10, timer=lambda: now[0])
+    def tag(x, *rest, **options):
+        calls.append(x)
+        return (x, rest, options)
+
+    assert tag(1, 2, a=1, b=2) == tag(1, 2, b=2, a=1) == (1, (2,), {"a": 1, "b": 2})
+    assert len(calls) == 1
+    now[0] = 9.9
+    tag(1, 2, a=1, b=2)
+    now[0] = 10.0
+    tag(1, 2, a=1, b=2)
+    assert len(calls) == 2
+    assert tag.cache_info() == CacheInfo(2, 2, 0, 1, None, 1)
+
+    assert tag([1]) == ([1], (), {}) and tag([1]) == ([1], (), {})
+    assert len(calls) == 4
+    with pytest.raises(TypeError):
+        tag()
+    with pytest.raises(ValueError):
+        cached(tag, ttl=0)
+    with pytest.raises(ValueError):
+        cached(tag, maxsize=-1)
+
+
+def test_cached_with_validation():
+    calls = []
+
+    @cached
+    @validate_positive(mode=True)
+    def ratio(a: int, b: int = 2) -> float:
+        calls.append((a, b))
+        return a / b
+
+    assert ratio(3) == ratio(3, 2) == ratio(a=3) == 1.5
+    assert calls == [(3, 2)]
+    for _ in range(2):
+        with pytest.raises(ValueError, match=r"^ratio\(\) .*: b=0$"):
+            ratio(3, b=0)
+    assert ratio.cache_info().currsize == 1
+    assert ratio.__wrapped__.__wrapped__.__name__ == "ratio"
+
+    @validate_positive(mode=True)
+    @cached
+    def double(x: int) -> int:
+        calls.append(x)
+        return 2 * x
+
+    assert double(4) == double(x=4) == 8
+    with pytest.raises(ValueError, match="x=-4"):
+        double(-4)
+    assert calls[-1:] == [4] and double.cache_info().hits == 1
+
+
+def test_cached_ttl_purges_unbounded_cache():
+    now = [0.0]
+
+    @cached(maxsize=None, ttl=10, timer=lambda: now[0])
+    def square(x):
+        return x * x
+
+    for x in range(100):
+        square(x)
+    square(0)  # a hit does not extend the entry's life
+    now[0] = 10.0
+    square(100)
+    # Expired entries go on the next insert without being looked up again
+    assert square.cache_info() == CacheInfo(1, 101, 0, 100, None, 1)
+    square(100)
+    assert square.cache_info().hits == 2
+    square.cache_clear()
+    assert square.cache_info() == CacheInfo(0, 0, 0, 0, None, 0)
+
+
+def test_cached_with_sampled_or_disabled_validation():
+    calls = []
+
+    @cached
+    @validate_positive(mode=3)
+    def half(x: int) -> float:
+        calls.append(x)
+        return x / 2
+
+    # Sampled: every call reaches the validator, so the sample still sees
+    # one call in three and no unchecked result is ever cached
+    assert [half(-2), half(-2)] == [-1.0, -1.0]
+    with pytest.raises(ValueError, match="x=-2"):
+        half(-2)
+    assert calls == [-2, -2] and half.cache_info().currsize == 0
+
+    # Off: results are cached, but only for calls made while it stays off
+    set_validation("off", half.__wrapped__)
+    assert half(-4) == half(-4) == -2.0
+    assert calls[2:] == [-4] and half.cache_info().currsize == 1
+    set_validation("on", half.__wrapped__)
+    with pytest.raises(ValueError, match="x=-4"):
+        half(-4)
+    assert half(4) == half(4) == 2.0
+    assert calls[3:] == [4]
+
+
+def test_cached_async():
+    calls = []
+
+    @cached(maxsize=4)
+    @validate_positive(mode=True)
+    async def fetch(item_id: int, retries: int = 1) -> str:
+        calls.append(item_id)
+        await asyncio.sleep(0)
+        return f"item-{item_id}"
+
+    async def main():
+        first = await fetch(7)
+        second = await fetch(item_id=7, retries=1)
+        with pytest.raises(ValueError, match="item_id=0"):
+            await fetch(0)
+        return first, second
+
+    assert asyncio.run(main()) == ("item-7", "item-7")
+    assert calls == [7]
+    assert fetch.cache_info().hits == 1
+    assert iscoroutinefunction(fetch)
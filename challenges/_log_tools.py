@@ -0,0 +1,465 @@
+"""
+Benchmarks and command-line tools for the log analyzer of challenge 06.
+
+Run `python -m challenges._log_tools --help` from the repository root.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pytest
+
+# The challenge module: its name starts with a digit, so no import
+# statement can name it
+_logs = import_module(f"{__package__}.06_generators_itertools")
+
+
+def _write_sample_log(file_path: str, n_lines: int) -> None:
+    """Write `n_lines` of realistic-looking log lines (mostly INFO)."""
+    levels = ["INFO"] * 17 + ["WARNING", "ERROR"]
+    messages = [
+        "User logged in",
+        "User logged out",
+        "Cache miss for key: user_123",
+        "Database connection failed",
+    ]
+    with open(file_path, "w") as f:
+        for i in range(n_lines):
+            f.write(
+                f"2024-01-15 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d} "
+                f"{levels[i % 19]} {messages[i % 4]}\n"
+            )
+
+
+def _peak_rss_kib() -> int:
+    """
+    Peak resident set size of this process, in KiB.
+
+    Linux carries `ru_maxrss` over from the parent across both fork and
+    exec, so a child's `ru_maxrss` is at least its parent's peak. VmHWM is
+    tracked per address space instead, and a freshly exec'd interpreter
+    starts with its own. Elsewhere this falls back to `ru_maxrss`.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _run_isolated(function: Callable, *args: Any) -> Any:
+    """
+    Call `function(*args)` in a freshly spawned process and return its result.
+
+    Forked children share (and are charged for) the parent's resident pages,
+    so benchmarks that report `_peak_rss_kib` run there instead: a spawned
+    interpreter's peak covers nothing but its own imports and work.
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(function, *args).result()
+
+
+def _time_reader(
+    file_path: str, reader: str, levels: Optional[List[str]]
+) -> Tuple[float, int]:
+    """Run one analysis; return (seconds, peak RSS in KiB of this process)."""
+    started = time.perf_counter()
+    _logs.analyze_logs(file_path, levels=levels, reader=reader)
+    elapsed = time.perf_counter() - started
+    return elapsed, _peak_rss_kib()
+
+
+def benchmark_readers(
+    n_lines: int = 10_000_000, levels: Optional[List[str]] = None
+) -> Dict[str, Dict[str, float]]:
+    """
+    Compare the 'text', 'mmap' and 'columnar' readers on a synthetic log file.
+
+    Each reader runs in a freshly spawned process (see `_run_isolated`), so
+    peak RSS is that reader's own, on top of the interpreter's baseline.
+
+    Returns:
+        Dict mapping reader name to lines/sec and peak RSS (MiB)
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "bench.log")
+        _write_sample_log(file_path, n_lines)
+        for reader in ("text", "mmap", "columnar"):
+            elapsed, peak_kib = _run_isolated(_time_reader, file_path, reader, levels)
+            results[reader] = {
+                "lines_per_sec": n_lines / elapsed,
+                "peak_rss_mib": peak_kib / 1024,
+            }
+    return results
+
+
+def benchmark_record_memory(n_lines: int = 100_000) -> Dict[str, Dict[str, float]]:
+    """
+    Compare the memory held by buffered records in each representation.
+
+    Parses `n_lines` synthetic lines as 'tuple' (`parse_log_line`),
+    'record' (a list of LogRecords plus the LogBatch they view) and
+    'batch' (the LogBatch alone), measured with tracemalloc.
+
+    Returns:
+        Dict mapping representation to total MiB and bytes per record
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "bench.log")
+        _write_sample_log(file_path, n_lines)
+        with open(file_path, "rb") as f:
+            data = f.read()
+    text = data.decode()
+
+    def records() -> Tuple[_logs.LogBatch, List[_logs.LogRecord]]:
+        batch = _logs.parse_log_batch(bytes(bytearray(data)))
+        return batch, list(batch)
+
+    # Batches keep their raw block alive, so they build from a traced copy
+    builders = {
+        "tuple": lambda: [_logs.parse_log_line(line) for line in text.splitlines()],
+        "record": records,
+        "batch": lambda: _logs.parse_log_batch(bytes(bytearray(data))),
+    }
+    results = {}
+    for name, build in builders.items():
+        tracemalloc.start()
+        try:
+            held = build()
+            size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del held
+        results[name] = {
+            "total_mib": size / (1 << 20),
+            "bytes_per_record": size / n_lines,
+        }
+    return results
+
+
+# Modes measured by `benchmark_suite`: name -> (function, input compression,
+# keyword arguments). Generators are timed to their first item and to
+# exhaustion; the other modes return a single result, so they have no
+# separate first-result latency. `window` is replaced by the suite's
+# (start, end) window over the middle tenth of the log.
+_SUITE_MODES = {
+    "read_logs": ("read_logs", None, {}),
+    "read_logs.gz": ("read_logs", "gzip", {}),
+    "read_logs.bz2": ("read_logs", "bz2", {}),
+    "read_logs.xz": ("read_logs", "xz", {}),
+    "read_log_bytes": ("read_log_bytes", None, {}),
+    "analyze_logs[text]": ("analyze_logs", None, {"reader": "text"}),
+    "analyze_logs[mmap]": ("analyze_logs", None, {"reader": "mmap"}),
+    "analyze_logs[columnar]": ("analyze_logs", None, {"reader": "columnar"}),
+    "analyze_logs[workers=2]": ("analyze_logs", None, {"workers": 2}),
+    "analyze_logs[ERROR]": ("analyze_logs", None, {"levels": ["ERROR"]}),
+    "analyze_logs[bounded]": ("analyze_logs", None, {"max_messages": 64}),
+    "analyze_logs[normalized]": ("analyze_logs", None, {"normalize": True}),
+    "analyze_logs[rollups]": ("analyze_logs", None, {"rollups": ["minute", "hour"]}),
+    "analyze_logs[window]": ("analyze_logs", None, {"window": True}),
+    "analyze_logs[window,scan]": (
+        "analyze_logs",
+        None,
+        {"window": True, "use_index": False},
+    ),
+    "analyze_logs.gz": ("analyze_logs", "gzip", {}),
+    "analyze_logs.bz2": ("analyze_logs", "bz2", {}),
+    "analyze_logs.xz": ("analyze_logs", "xz", {}),
+    "query_logs[ERROR,limit]": (
+        "query_logs",
+        None,
+        {"levels": ["ERROR"], "limit": 100},
+    ),
+}
+
+
+def _suite_window(file_path: str) -> Tuple[Optional[str], Optional[str]]:
+    """Index `file_path` and return a window over its middle tenth."""
+    segments = _logs.update_log_index(file_path)["segments"]
+    lows = [low for _, low, _ in segments if low is not None]
+    if not lows:
+        return None, None
+    return lows[len(lows) * 9 // 20], lows[len(lows) * 11 // 20]
+
+
+def _time_mode(
+    file_path: str, mode: str, window: Tuple[Optional[str], Optional[str]]
+) -> Tuple[Optional[float], float, int]:
+    """
+    Run one suite mode; return (first result s or None, total s, peak RSS
+    KiB of this process).
+    """
+    function, kind, kwargs = _SUITE_MODES[mode]
+    kwargs = dict(kwargs)
+    if kwargs.pop("window", False):
+        kwargs["start"], kwargs["end"] = window
+    if kind is not None:
+        file_path += f".{kind}"
+    first = None
+    started = time.perf_counter()
+    result = getattr(_logs, function)(file_path, **kwargs)
+    if isinstance(result, Iterator):
+        next(result, None)
+        first = time.perf_counter() - started
+        for _ in result:
+            pass
+    elapsed = time.perf_counter() - started
+    return first, elapsed, _peak_rss_kib()
+
+
+def benchmark_suite(
+    n_lines: int = 1_000_000,
+    modes: Optional[Sequence[str]] = None,
+    **options: Any,
+) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Measure every `read_logs`/`analyze_logs`/`query_logs` mode on one log.
+
+    The log is written by `write_synthetic_log(n_lines, **options)`, along
+    with the compressed copies and the index the chosen modes need. Each
+    mode runs in a freshly spawned process (see `_run_isolated`), so peak
+    RSS is its own; worker processes started by a mode are not included.
+
+    Args:
+        n_lines: Lines in the synthetic log
+        modes: Names from `_SUITE_MODES` to run (default: all)
+        **options: Generator options (seed, level_mix, cardinality,
+            line_length, malformed_ratio, ...)
+
+    Returns:
+        Dict mapping mode to 'lines_per_sec' (lines in the log per second,
+        so modes that read less of it score higher), 'peak_rss_mib' and
+        'first_result_ms' (None unless the mode yields results lazily)
+    """
+    modes = list(modes or _SUITE_MODES)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "suite.log")
+        _logs.write_synthetic_log(file_path, n_lines, **options)
+        for kind in {_SUITE_MODES[mode][1] for mode in modes} - {None}:
+            with open(file_path, "rb") as src, _logs._OPENERS[kind](
+                f"{file_path}.{kind}", "wb"
+            ) as dst:
+                while chunk := src.read(1 << 20):
+                    dst.write(chunk)
+        window = None, None
+        if any("window" in _SUITE_MODES[mode][2] for mode in modes):
+            window = _suite_window(file_path)
+        for mode in modes:
+            first, elapsed, peak_kib = _run_isolated(
+                _time_mode, file_path, mode, window
+            )
+            results[mode] = {
+                "lines_per_sec": n_lines / elapsed if elapsed else 0.0,
+                "peak_rss_mib": peak_kib / 1024,
+                "first_result_ms": None if first is None else first * 1000,
+            }
+    return results
+
+
+def save_baseline(
+    results: Dict[str, Dict[str, float]], baseline_path: str, **meta: Any
+) -> None:
+    """Store suite results (and how they were produced) as a JSON baseline."""
+    with open(baseline_path, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2, sort_keys=True)
+
+
+def compare_to_baseline(
+    results: Dict[str, Dict[str, float]],
+    baseline_path: str,
+    tolerance: float = 0.2,
+) -> List[str]:
+    """
+    List regressions of `results` against a saved baseline.
+
+    A mode regresses if its throughput dropped, or its peak RSS or first
+    result latency grew, by more than `tolerance` (a fraction). Modes and
+    measurements missing (or None) on either side are ignored.
+
+    Returns:
+        One human-readable line per regression (empty if none)
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    for mode, now in results.items():
+        before = baseline.get(mode)
+        if before is None:
+            continue
+        if now["lines_per_sec"] < before["lines_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{mode}: {now['lines_per_sec']:,.0f} lines/s "
+                f"(baseline {before['lines_per_sec']:,.0f})"
+            )
+        for key, unit in (("peak_rss_mib", "MiB"), ("first_result_ms", "ms")):
+            if now.get(key) is None or before.get(key) is None:
+                continue
+            if now[key] > before[key] * (1 + tolerance):
+                regressions.append(
+                    f"{mode}: {key} {now[key]:.1f} {unit} "
+                    f"(baseline {before[key]:.1f} {unit})"
+                )
+    return regressions
+
+
+# Test cases
+def _peak_rss_holding(n_bytes: int) -> int:
+    """`_peak_rss_kib` while holding `n_bytes` of resident memory."""
+    held = b"\x01" * n_bytes
+    peak = _peak_rss_kib()
+    del held
+    return peak
+
+
+def test_run_isolated_peak_rss():
+    # Each spawned child reports its own peak: one holding 8 MiB more than
+    # another peaks about 8 MiB higher, whatever the parent's peak is
+    idle = _run_isolated(_peak_rss_kib)
+    holding = _run_isolated(_peak_rss_holding, 8 << 20)
+    assert 6 << 10 < holding - idle < 12 << 10
+
+
+def test_benchmark_record_memory():
+    results = benchmark_record_memory(2000)
+    assert set(results) == {"tuple", "record", "batch"}
+    sizes = [results[name]["bytes_per_record"] for name in ("tuple", "record", "batch")]
+    assert sizes == sorted(sizes, reverse=True)
+
+
+def test_benchmark_suite_baselines(tmp_path):
+    modes = ["read_logs", "read_logs.gz", "analyze_logs[mmap]"]
+    results = benchmark_suite(2000, modes, malformed_ratio=0.01)
+    assert list(results) == modes
+    for stats in results.values():
+        assert stats["lines_per_sec"] > 0
+        assert stats["peak_rss_mib"] > 0
+    assert 0 <= results["read_logs"]["first_result_ms"]
+    assert results["analyze_logs[mmap]"]["first_result_ms"] is None
+
+    baseline = str(tmp_path / "baseline.json")
+    save_baseline(results, baseline, n_lines=2000)
+    assert compare_to_baseline(results, baseline) == []
+    slower = {mode: dict(stats) for mode, stats in results.items()}
+    slower["read_logs"]["lines_per_sec"] /= 2
+    slower["analyze_logs[mmap]"]["peak_rss_mib"] *= 2
+    regressions = compare_to_baseline(slower, baseline)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("read_logs:")
+    assert compare_to_baseline(slower, baseline, tolerance=1.5) == []
+
+
+def test_index_command(tmp_path, capsys):
+    log_file = tmp_path / "app.log"
+    _logs.write_synthetic_log(str(log_file), 100)
+    index_path = str(tmp_path / "custom.idx")
+    command = ["index", str(log_file), "--index-path", index_path]
+
+    main(command + ["--every", "5"])
+    assert capsys.readouterr().out.startswith("20 segments")
+    assert not _logs.index_is_stale(str(log_file), index_path)
+    with pytest.raises(SystemExit) as fresh:
+        main(command + ["--check"])
+    assert fresh.value.code == 0
+
+    with open(log_file, "a") as f:
+        f.write("2024-01-15 00:00:10 ERROR Late entry\n")
+    with pytest.raises(SystemExit) as stale:
+        main(command + ["--check"])
+    assert stale.value.code == 1 and capsys.readouterr().out == "fresh\nstale\n"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point: `bench`, `suite`, `memory` and `index`."""
+    parser = argparse.ArgumentParser(description="Log analyzer utilities")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bench = commands.add_parser("bench", help="Compare reader throughput")
+    bench.add_argument("n_lines", type=int, nargs="?", default=10_000_000)
+    bench.add_argument("--levels", nargs="+")
+
+    memory = commands.add_parser("memory", help="Compare record memory use")
+    memory.add_argument("n_lines", type=int, nargs="?", default=100_000)
+
+    suite = commands.add_parser("suite", help="Benchmark every pipeline mode")
+    suite.add_argument("n_lines", type=int, nargs="?", default=1_000_000)
+    suite.add_argument("--modes", nargs="+", choices=list(_SUITE_MODES))
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--cardinality", type=int, default=100)
+    suite.add_argument("--line-length", type=int, default=60)
+    suite.add_argument("--malformed-ratio", type=float, default=0.0)
+    suite.add_argument("--baseline", help="JSON baseline to compare against")
+    suite.add_argument(
+        "--save", action="store_true", help="Write the results as the baseline"
+    )
+    suite.add_argument("--tolerance", type=float, default=0.2)
+
+    index = commands.add_parser("index", help="Build or update a time index")
+    index.add_argument("file_path")
+    index.add_argument("--index-path")
+    index.add_argument("--every", type=int, default=1000)
+    index.add_argument(
+        "--check", action="store_true", help="Only report whether it is stale"
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "bench":
+        for name, stats in benchmark_readers(args.n_lines, args.levels).items():
+            print(
+                f"{name:>8}: {stats['lines_per_sec']:>12,.0f} lines/s"
+                f"  peak RSS {stats['peak_rss_mib']:.1f} MiB"
+            )
+    elif args.command == "suite":
+        options = {
+            "seed": args.seed,
+            "cardinality": args.cardinality,
+            "line_length": args.line_length,
+            "malformed_ratio": args.malformed_ratio,
+        }
+        results = benchmark_suite(args.n_lines, args.modes, **options)
+        for name, stats in results.items():
+            first = stats["first_result_ms"]
+            print(
+                f"{name:>26}: {stats['lines_per_sec']:>12,.0f} lines/s"
+                f"  peak RSS {stats['peak_rss_mib']:.1f} MiB"
+                + ("" if first is None else f"  first result {first:.1f} ms")
+            )
+        if args.baseline and args.save:
+            save_baseline(results, args.baseline, n_lines=args.n_lines, **options)
+        elif args.baseline:
+            regressions = compare_to_baseline(results, args.baseline, args.tolerance)
+            for regression in regressions:
+                print(f"REGRESSION {regression}")
+            sys.exit(1 if regressions else 0)
+    elif args.command == "memory":
+        for name, stats in benchmark_record_memory(args.n_lines).items():
+            print(
+                f"{name:>8}: {stats['bytes_per_record']:>8.1f} bytes/record"
+                f"  total {stats['total_mib']:.1f} MiB"
+            )
+    elif args.check:
+        stale = _logs.index_is_stale(args.file_path, args.index_path)
+        print("stale" if stale else "fresh")
+        sys.exit(1 if stale else 0)
+    else:
+        built = _logs.update_log_index(args.file_path, args.index_path, args.every)
+        print(f"{len(built['segments'])} segments covering {built['size']} bytes")
+
+
+if __name__ == "__main__":
+    main()